@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
 from .routers import ppt
+from .services.resources import create_resources
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 模型、连接池、索引、扩写线程池只在启动时创建一次
+    resources = create_resources(get_settings())
+    app.state.resources = resources
+    try:
+        yield
+    finally:
+        resources.close()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     # 允许前端（如 localhost:3000）跨域访问
     app.add_middleware(
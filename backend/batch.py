@@ -0,0 +1,171 @@
+"""离线批处理：扫描目录或 zip 中的 .pptx，预先生成扩写结果写入缓存。
+
+用法：python -m backend.batch <目录或zip> [--workers N] [--manifest PATH]
+
+解析与向量化放在进程池里并行，LLM 扩写在主进程内执行并共享同一个限流器
+（LLM_RPM）。每完成一份 PPT 就写一次清单，中断后重跑会跳过已完成的文件；
+结果写入流水线缓存目录，之后 /ppt/process 上传同一文件可直接命中。
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import sys
+import time
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Tuple
+
+from .config import get_settings
+from .models import SlideChunk
+from .services.pipeline import PPTAgentPipeline, file_digest
+from .services.resources import create_resources
+from .services.storage import atomic_write_text
+
+MANIFEST_VERSION = 1
+
+
+def _crc32(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def collect_decks(source: Path) -> List[Path]:
+    """目录递归查找 .pptx；zip 则解压其中的 .pptx 到 data/batch/<zip名>/"""
+    if source.is_dir():
+        decks = [p for p in source.rglob("*.pptx") if not p.name.startswith("~$")]
+        return sorted(decks)
+    if zipfile.is_zipfile(source):
+        target = get_settings().data_dir / "batch" / source.stem
+        target.mkdir(parents=True, exist_ok=True)
+        root = target.resolve()
+        decks = []
+        with zipfile.ZipFile(source) as zf:
+            for idx, info in enumerate(zf.infolist()):
+                name = PurePosixPath(info.filename.replace("\\", "/"))
+                if info.is_dir() or name.suffix.lower() != ".pptx" or name.name.startswith("~$"):
+                    continue
+                # 扁平化为单层文件名：去掉根、盘符与 ..，再校验落在 target 内，防止路径穿越；
+                # 加成员序号前缀，避免 a/x.pptx 与 a_x.pptx 落到同一个文件
+                parts = [p for p in name.parts if p not in ("/", ".", "..") and ":" not in p]
+                if not parts:
+                    continue
+                dest = target / f"{idx:04d}_{'_'.join(parts)}"
+                if dest.resolve().parent != root:
+                    continue
+                # 只有 CRC 一致才复用已解压文件，同名 zip 的旧文件会被覆盖
+                if not dest.exists() or _crc32(dest) != info.CRC:
+                    with zf.open(info) as src, dest.open("wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                decks.append(dest)
+        return sorted(decks)
+    raise ValueError(f"{source} 既不是目录也不是 zip 文件")
+
+
+def load_manifest(path: Path) -> Dict:
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                return data
+        except Exception:
+            pass
+    return {"version": MANIFEST_VERSION, "decks": {}}
+
+
+def save_manifest(path: Path, manifest: Dict) -> None:
+    # 原子替换，中断时不会留下半个清单
+    atomic_write_text(path, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def _init_worker() -> None:
+    # 每个子进程预先加载一次向量模型
+    from .services.embedding import _get_model
+
+    _get_model()
+
+
+def _parse_and_embed(ppt_path: str) -> Tuple[str, List[dict], List[List[float]]]:
+    from .services.embedding import embed_texts
+    from .services.parser import parse_ppt
+
+    slides = parse_ppt(Path(ppt_path))
+    texts = [slide.raw_text for slide in slides]
+    embeddings = embed_texts(texts) if texts else []
+    return ppt_path, [slide.model_dump() for slide in slides], embeddings
+
+
+def run_batch(source: Path, workers: int, manifest_path: Path) -> int:
+    decks = collect_decks(source)
+    manifest = load_manifest(manifest_path)
+    entries: Dict[str, Dict] = manifest["decks"]
+    cache_dir = get_settings().data_dir / "cache"
+
+    pending: Dict[str, str] = {}
+    for deck in decks:
+        digest = file_digest(deck)
+        entry = entries.get(digest)
+        if entry and entry.get("status") == "done" and (cache_dir / f"{digest}.json").exists():
+            continue
+        pending[str(deck)] = digest
+    print(f"共 {len(decks)} 份 PPT，已完成 {len(decks) - len(pending)}，待处理 {len(pending)}")
+
+    failed = 0
+    # 主进程只建一份共享资源（连接池、索引、扩写线程池），所有 PPT 复用
+    resources = create_resources()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(_parse_and_embed, path): path for path in pending}
+            for done, fut in enumerate(concurrent.futures.as_completed(futures), start=1):
+                path = futures[fut]
+                start = time.monotonic()
+                try:
+                    _, slide_dicts, embeddings = fut.result()
+                    slides = [SlideChunk(**d) for d in slide_dicts]
+                    topics, _ = PPTAgentPipeline(resources).run_parsed(
+                        Path(path), slides, embeddings, digest=pending[path]
+                    )
+                    entries[pending[path]] = {
+                        "path": path,
+                        "status": "done",
+                        "topics": len(topics),
+                        "seconds": round(time.monotonic() - start, 2),
+                    }
+                    print(f"[{done}/{len(pending)}] 完成 {path}（{len(topics)} 个知识块）")
+                except Exception as e:
+                    failed += 1
+                    entries[pending[path]] = {"path": path, "status": "failed", "error": str(e)}
+                    print(f"[{done}/{len(pending)}] 失败 {path}: {e}", file=sys.stderr)
+                save_manifest(manifest_path, manifest)
+    finally:
+        resources.close()
+    return 1 if failed else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="批量预处理 PPT 并写入缓存")
+    parser.add_argument("source", type=Path, help="包含 .pptx 的目录或 zip 文件")
+    parser.add_argument(
+        "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="解析/向量化进程数"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=settings.data_dir / "cache" / "batch_manifest.json",
+        help="断点续跑清单路径",
+    )
+    args = parser.parse_args(argv)
+    args.manifest.parent.mkdir(parents=True, exist_ok=True)
+    return run_batch(args.source, args.workers, args.manifest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""多 worker 吞吐基准：依次以 1..N 个 worker 启动 gunicorn，压测并输出 requests/sec。
+
+用法：python -m backend.bench_workers --pptx sample.pptx --mode uncached --max-workers 4
+
+--mode：
+  health    压测 /health；
+  cached    反复上传同一 PPT，预热后全部命中整份缓存（上传 + 哈希 + 读 JSON）；
+  uncached  每次请求改写 zip 注释得到内容不同的 PPT，绕过缓存，走完整的
+            解析 → 向量化 → 聚合 → 扩写流程（检索/LLM 不可达时走兜底）。
+每档同时输出 gunicorn 进程树的 RSS 与 USS 合计，USS 远小于 RSS 说明模型权重在 worker 间共享。
+数据写入临时 DATA_DIR，不污染 backend/data。需在仓库根目录运行，且已安装 requirements.txt。
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import itertools
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent
+_EOCD = b"PK\x05\x06"
+
+
+def _unique_deck(pptx: bytes, n: int) -> bytes:
+    """改写 zip 末尾注释生成内容不同、仍可正常解析的 PPT（要求原文件无注释）"""
+    if pptx[-22:-18] != _EOCD:
+        raise ValueError("uncached 模式要求 PPT 的 zip 末尾没有注释")
+    comment = f"bench-{n}".encode()
+    return pptx[:-2] + struct.pack("<H", len(comment)) + comment
+
+
+def _wait_ready(base_url: str, timeout: float = 300.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("服务启动超时")
+
+
+def _one_request(session: requests.Session, base_url: str, deck: bytes | None) -> bool:
+    if deck is None:
+        resp = session.get(f"{base_url}/health", timeout=30)
+    else:
+        resp = session.post(f"{base_url}/ppt/process", files={"file": ("bench.pptx", deck)}, timeout=300)
+    return resp.ok
+
+
+def _memory_mb(root_pid: int) -> Tuple[float, float]:
+    """进程树的 RSS 与 USS 合计（MB），USS 为进程独占、未与其他进程共享的内存"""
+    pids = [root_pid]
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # /proc/<pid>/stat 第 4 个字段为父进程号（进程名在括号内，可能含空格）
+            if int(stat.read_text().rsplit(")", 1)[1].split()[1]) == root_pid:
+                pids.append(int(stat.parent.name))
+        except (OSError, IndexError, ValueError):
+            continue
+    rss = uss = 0
+    for pid in pids:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key == "Rss":
+                rss += int(value.split()[0])
+            elif key in ("Private_Clean", "Private_Dirty"):
+                uss += int(value.split()[0])
+    return rss / 1024, uss / 1024
+
+
+def _load(base_url: str, mode: str, pptx: bytes | None, clients: int, duration: float) -> float:
+    stop_at = time.monotonic() + duration
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def next_deck() -> bytes | None:
+        if mode != "uncached":
+            return pptx
+        with lock:
+            n = next(counter)
+        return _unique_deck(pptx, n)
+
+    def client() -> int:
+        ok = 0
+        with requests.Session() as session:
+            while time.monotonic() < stop_at:
+                if _one_request(session, base_url, next_deck()):
+                    ok += 1
+        return ok
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=clients) as pool:
+        total = sum(pool.map(lambda _: client(), range(clients)))
+    return total / (time.monotonic() - start)
+
+
+def bench(
+    workers: int, port: int, mode: str, pptx: bytes | None, clients: int, duration: float, data_dir: Path
+) -> Tuple[float, float, float]:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    env["PYTHONPATH"] = str(BACKEND_DIR.parent) + os.pathsep + env.get("PYTHONPATH", "")
+    run_dir = data_dir / f"w{workers}"
+    env["DATA_DIR"] = str(run_dir)
+    env["FAISS_PATH"] = str(run_dir / "faiss.index")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "backend.app:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url)
+        with requests.Session() as session:
+            # 预热：cached 模式写入整份缓存；其余模式让各 worker 完成首次请求的惰性初始化
+            for n in range(workers):
+                deck = _unique_deck(pptx, -1 - n) if mode == "uncached" else pptx
+                _one_request(session, base_url, None if mode == "health" else deck)
+        rps = _load(base_url, mode, None if mode == "health" else pptx, clients, duration)
+        rss, uss = _memory_mb(proc.pid)
+        return rps, rss, uss
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="gunicorn 多 worker 吞吐基准")
+    parser.add_argument("--pptx", type=Path, default=None, help="压测 /ppt/process 使用的 PPT")
+    parser.add_argument("--mode", choices=["health", "cached", "uncached"], default=None)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--clients", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--duration", type=float, default=20.0, help="每档压测秒数")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", type=Path, default=None, help="服务端 DATA_DIR，默认临时目录")
+    args = parser.parse_args(argv)
+
+    mode = args.mode or ("uncached" if args.pptx else "health")
+    if mode != "health" and not args.pptx:
+        parser.error(f"--mode {mode} 需要 --pptx")
+    pptx = args.pptx.read_bytes() if args.pptx else None
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="ppt-bench-"))
+
+    # 1, 2, 4, ... 直到 max-workers，并保证测到 max-workers 本身
+    steps = [1 << i for i in range(args.max_workers.bit_length()) if 1 << i < args.max_workers]
+    steps.append(args.max_workers)
+
+    print(f"mode={mode} clients={args.clients} duration={args.duration}s cpus={os.cpu_count()}")
+    print(f"{'workers':>7}  {'req/s':>9}  {'speedup':>7}  {'RSS MB':>8}  {'USS MB':>8}")
+    baseline = None
+    for workers in steps:
+        rps, rss, uss = bench(workers, args.port, mode, pptx, args.clients, args.duration, data_dir)
+        baseline = baseline or rps
+        print(f"{workers:>7}  {rps:>9.2f}  {rps / baseline:>6.2f}x  {rss:>8.0f}  {uss:>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,10 @@ class Settings(BaseSettings):
     data_dir: Path = Field(default=Path("data"), env="DATA_DIR")
     faiss_path: Path = Field(default=Path("data/faiss.index"), env="FAISS_PATH")
     top_k: int = Field(default=4, env="TOP_K")
+    # LLM 每分钟请求上限，0 表示不限；同一进程内所有线程/批处理任务共享
+    llm_rpm: int = Field(default=0, env="LLM_RPM")
+    # 应用级扩写线程池大小，所有请求共享
+    enrich_workers: int = Field(default=8, env="ENRICH_WORKERS")
 
     model_config = {
         "env_file": ".env",
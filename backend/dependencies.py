@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from fastapi import Request
+
+from .services.resources import AppResources
+
+
+def get_resources(request: Request) -> AppResources:
+    return request.app.state.resources
@@ -0,0 +1,28 @@
+"""多 worker 部署：gunicorn -c gunicorn.conf.py backend.app:app
+
+master 进程在 fork 前加载 SentenceTransformer，各 worker 以写时复制方式共享模型权重；
+磁盘缓存（data/cache 下的 JSON、faiss.index）通过原子替换与文件锁支持多进程并发读写。
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# 先导入应用再 fork，模型与只读数据只在 master 中加载一次
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+graceful_timeout = 60
+
+
+def on_starting(server):
+    # 只加载权重，不做推理：避免在 fork 前初始化 torch 的线程池
+    from backend.services.embedding import _get_model
+
+    _get_model()
+
+
+def post_fork(server, worker):
+    # 各 worker 平分 CPU，避免 N 个进程各自开满 intra-op 线程
+    import torch
+
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // server.cfg.workers))
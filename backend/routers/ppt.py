@@ -1,25 +1,37 @@
 from __future__ import annotations
 
+import asyncio
 import tempfile
 from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-import requests
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from starlette.concurrency import run_in_threadpool
 
+from ..dependencies import get_resources
 from ..models import ProcessResponse
+from ..services.cancel import DEADLINE_EXCEEDED, CancelToken, PipelineCancelled
 from ..services.pipeline import PPTAgentPipeline
+from ..services.resources import AppResources
 
 router = APIRouter(prefix="/ppt", tags=["ppt"])
 
 
+# 客户端已断开时的状态码（nginx 约定），仅用于日志
+CLIENT_CLOSED_REQUEST = 499
+
+
 @router.post("/process", response_model=ProcessResponse)
 async def process_ppt(
+    request: Request,
     file: UploadFile | None = File(None),
     url: str | None = Form(None),
+    deadline: float | None = Form(None, gt=0, description="处理截止时间（秒），超时取消未完成的主题"),
+    resources: AppResources = Depends(get_resources),
 ) -> ProcessResponse:
     if not file and not url:
         raise HTTPException(status_code=400, detail="file 或 url 至少提供一个")
+    cancel = CancelToken(timeout=deadline)
 
     if file:
         suffix = Path(file.filename).suffix
@@ -29,7 +41,9 @@ async def process_ppt(
             temp_path = Path(tmp.name)
     else:
         try:
-            resp = requests.get(url, timeout=30, allow_redirects=True)
+            resp = await run_in_threadpool(
+                resources.http.get, url, timeout=cancel.timeout(30), allow_redirects=True
+            )
             resp.raise_for_status()
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"下载 URL 失败: {e}")
@@ -52,6 +66,20 @@ async def process_ppt(
             tmp.write(content)
             temp_path = Path(tmp.name)
 
-    pipeline = PPTAgentPipeline()
-    topics, global_notes = pipeline.run(temp_path)
+    pipeline = PPTAgentPipeline(resources, cancel=cancel)
+    task = asyncio.ensure_future(run_in_threadpool(pipeline.run, temp_path))
+    try:
+        # 流水线在线程池里跑，这里轮询客户端是否断开；截止时间由流水线自行检查
+        while not task.done():
+            await asyncio.wait({task}, timeout=0.5)
+            if not task.done() and await request.is_disconnected():
+                cancel.cancel("client disconnected")
+        topics, global_notes = await task
+    except asyncio.CancelledError:
+        cancel.cancel("request cancelled")
+        raise
+    except PipelineCancelled as e:
+        # 已完成的主题已写入单主题缓存，重试时直接复用
+        status = 504 if cancel.reason == DEADLINE_EXCEEDED else CLIENT_CLOSED_REQUEST
+        raise HTTPException(status_code=status, detail=f"处理已取消: {e.reason}")
     return ProcessResponse(slides=[], topics=topics, global_notes=global_notes)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+import time
+
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+
+class PipelineCancelled(Exception):
+    """请求被取消（客户端断开或超过截止时间），未完成的主题不再扩写"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """协作式取消：流水线在各阶段检查；外部 HTTP 调用的超时收紧到剩余时间"""
+
+    def __init__(self, timeout: float | None = None):
+        self._event = threading.Event()
+        self._reason = ""
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+            return True
+        return False
+
+    @property
+    def reason(self) -> str:
+        return self._reason
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def timeout(self, default: float) -> float:
+        """外部调用的超时：不超过剩余时间，截止后立即超时"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(0.1, min(default, remaining))
+
+    def wait(self, timeout: float) -> bool:
+        """最多等待 timeout 秒，被取消或到达截止时间时提前返回；返回是否已取消"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = max(0.0, min(timeout, remaining))
+        self._event.wait(timeout)
+        return self.cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise PipelineCancelled(self._reason)
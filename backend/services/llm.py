@@ -1,10 +1,75 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
+from pathlib import Path
 from typing import List, Optional
 
 import requests
 
 from ..config import get_settings
+from .cancel import CancelToken
+from .storage import atomic_write_text, file_lock
+
+
+class RateLimiter:
+    """最小间隔限流：rpm <= 0 时不限流，线程安全。
+
+    传入 state_path 时，下一个可用时刻记录在该文件中并用文件锁保护，
+    同一数据目录下的多个进程（gunicorn worker、批处理）共享同一个 rpm 上限。
+    """
+
+    def __init__(self, rpm: int = 0, state_path: Path | None = None):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self, cancel: Optional[CancelToken] = None) -> bool:
+        """等到可以发出下一个请求；cancel 已取消时不占用额度，等待中被取消返回 False"""
+        if not self.interval:
+            return True
+        if cancel is not None and cancel.cancelled:
+            return False
+        with self._lock:
+            wait = self._reserve()
+        if wait > 0:
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                return False
+        return True
+
+    def _reserve(self) -> float:
+        """预约下一个请求时刻，返回需要等待的秒数"""
+        if self.state_path is None:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+            return wait
+        # 跨进程共享时用墙上时间，各进程的 monotonic 起点不同
+        with file_lock(self.state_path):
+            now = time.time()
+            try:
+                next_at = float(self.state_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                next_at = 0.0
+            atomic_write_text(self.state_path, repr(max(now, next_at) + self.interval))
+        return next_at - now
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = get_settings()
+            _limiter = RateLimiter(settings.llm_rpm, state_path=settings.data_dir / "cache" / "llm_rate")
+        return _limiter
 
 
 class LLMClient:
@@ -13,53 +78,107 @@ class LLMClient:
         api_key: Optional[str] = None,
         model_name: Optional[str] = None,
         base_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
         settings = get_settings()
+        # 未注入连接池时退回模块级 requests（每次新建连接）
+        self.http = session or requests
         self.api_key = api_key or settings.openai_api_key
         self.model_name = model_name or settings.model_name
         self.base_url = base_url or settings.llm_base_url
 
-    def _fallback(self, prompt: str) -> str:
+    def fallback(self, prompt: str) -> str:
         head = prompt[:128].replace("\n", " ")
         return f"[离线模式] 无法访问LLM。请检查OPENAI_API_KEY。提示摘要: {head}"
 
-    def complete(self, prompt: str) -> str:
+    def complete(self, prompt: str, timeout: float = 60) -> str:
+        reply = self.try_complete(prompt, timeout=timeout)
+        return reply if reply is not None else self.fallback(prompt)
+
+    def try_complete(
+        self, prompt: str, timeout: float = 60, cancel: Optional[CancelToken] = None
+    ) -> Optional[str]:
+        """返回模型回复；未配置密钥、请求失败或被取消时返回 None，由调用方决定是否兜底。
+
+        传入 cancel 时以流式方式读取，每个数据块之间检查取消，取消即关闭连接。
+        """
         if not self.api_key:
-            return self._fallback(prompt)
-        try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model_name,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "你是一个教学助理，请用简洁的方式补充背景、公式与示例。",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.4,
+            return None
+        if not get_rate_limiter().acquire(cancel):
+            return None
+        payload = {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "你是一个教学助理，请用简洁的方式补充背景、公式与示例。",
                 },
-                timeout=60,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"].strip()
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.4,
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        try:
+            if cancel is None:
+                response = self.http.post(self.base_url, headers=headers, json=payload, timeout=timeout)
+                response.raise_for_status()
+                data = response.json()
+                return data["choices"][0]["message"]["content"].strip()
+            if cancel.cancelled:
+                return None
+            return self._stream_complete(headers, payload, timeout, cancel)
         except Exception:
-            return self._fallback(prompt)
+            return None
 
-    def expand_slide(self, slide_text: str, search_snippets: List[str]) -> str:
-        prompt = (
+    def _stream_complete(
+        self, headers: dict, payload: dict, timeout: float, cancel: CancelToken
+    ) -> Optional[str]:
+        # 关闭响应即断开连接，服务端随之停止生成
+        with self.http.post(
+            self.base_url,
+            headers=headers,
+            json={**payload, "stream": True},
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                # 服务端忽略了 stream 参数，按普通 JSON 回复解析
+                return response.json()["choices"][0]["message"]["content"].strip()
+            parts: List[str] = []
+            done = False
+            # 按字节读取再解码：text/event-stream 常不带 charset，requests 会误判编码
+            for line in response.iter_lines():
+                if cancel.cancelled:
+                    return None
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    done = True
+                    break
+                # 部分服务端会发送不带 choices 的数据块（如用量统计），直接跳过
+                choices = json.loads(data.decode("utf-8")).get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    parts.append(delta)
+            reply = "".join(parts).strip()
+            # 没等到 [DONE] 说明连接中途断开，半截回复不能当作完整结果缓存
+            return reply if done and reply else None
+
+    def expand_prompt(self, slide_text: str, search_snippets: List[str]) -> str:
+        return (
             "下面是PPT页内容，请补充背景、推导或代码示例，并指出应补充的参考链接。"
             "要求结构化输出：1)概要；2)加深理解的要点列表；3)推荐阅读。"
             f"\n\nPPT内容：\n{slide_text}\n\n检索片段：\n"
             + "\n".join(search_snippets)
         )
-        return self.complete(prompt)
+
+    def expand_slide(self, slide_text: str, search_snippets: List[str]) -> str:
+        return self.complete(self.expand_prompt(slide_text, search_snippets))
 
     def summarize_global(self, outline: str, topics: str) -> str:
         prompt = (
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
 
 from ..models import SlideChunk
 
@@ -20,9 +21,27 @@ def _collect_text(shape) -> str:
     return ""
 
 
-def parse_ppt(ppt_path: Path) -> List[SlideChunk]:
+# 章节标题页版式名（python-pptx 默认模板为 "Section Header"，中文 Office 为 "节标题"）
+_SECTION_LAYOUT_KEYWORDS = ("section", "节标题", "章节")
+
+
+def _is_heading(slide) -> bool:
+    """章节标题页：标题占位符为封面标题，或版式为节标题。
+
+    只看占位符类型与版式名，普通文本框、标题加图片的页面不算章节页。
+    """
+    title_shape = slide.shapes.title
+    if title_shape is None or not title_shape.text.strip():
+        return False
+    if title_shape.placeholder_format.type == PP_PLACEHOLDER.CENTER_TITLE:
+        return True
+    layout_name = (slide.slide_layout.name or "").lower()
+    return any(kw in layout_name for kw in _SECTION_LAYOUT_KEYWORDS)
+
+
+def iter_ppt(ppt_path: Path) -> Iterator[SlideChunk]:
+    """逐页产出 SlideChunk，章节沿用最近的标题页，供流水线边解析边处理"""
     prs = Presentation(str(ppt_path))
-    slides: List[SlideChunk] = []
     current_section: str | None = None
     for idx, slide in enumerate(prs.slides, start=1):
         title_shapes = [shape for shape in slide.shapes if shape.has_text_frame]
@@ -45,25 +64,20 @@ def parse_ppt(ppt_path: Path) -> List[SlideChunk]:
                 levels.extend(para_levels)
         raw_text = "\n".join(bullets)
         notes = slide.has_notes_slide and slide.notes_slide.notes_text_frame.text or None
-        is_heading = bool(title and not raw_text.strip())
+        is_heading = _is_heading(slide)
         if is_heading:
             current_section = title
-        slides.append(
-            SlideChunk(
-                slide_number=idx,
-                title=title,
-                bullets=bullets,
-                notes=notes,
-                raw_text=raw_text,
-                section=current_section,
-                is_heading=is_heading,
-                level=min(levels) if levels else 0,
-            )
+        yield SlideChunk(
+            slide_number=idx,
+            title=title,
+            bullets=bullets,
+            notes=notes,
+            raw_text=raw_text,
+            section=current_section,
+            is_heading=is_heading,
+            level=min(levels) if levels else 0,
         )
-    last_section = None
-    for slide in slides:
-        if slide.is_heading:
-            last_section = slide.title
-        if not slide.section:
-            slide.section = last_section
-    return slides
+
+
+def parse_ppt(ppt_path: Path) -> List[SlideChunk]:
+    return list(iter_ppt(ppt_path))
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
+import contextlib
+import hashlib
 import json
+import queue
+import shutil
+import threading
 import concurrent.futures
 
 import numpy as np
@@ -12,186 +17,116 @@ from ..config import get_settings
 from ..models import EnrichmentItem, GlobalNotes, SlideChunk, SlideEnrichment, TopicNote
 from .embedding import embed_texts, embed_single
 from .llm import LLMClient
-from .parser import parse_ppt
+from .cancel import CancelToken
+from .parser import iter_ppt
+from .resources import AppResources
 from .search import search_arxiv, search_wikipedia, search_wikipedia_cn
+from .storage import atomic_write_text
 from .vector_store import VectorStore
 
 
-class PPTAgentPipeline:
-    def __init__(self) -> None:
-        settings = get_settings()
-        self.settings = settings
-        self.llm = LLMClient()
-        # build a small dummy vector store; dimension will be filled after first embedding
-        self.vector_store: VectorStore | None = None
-        self.corpus: List[SlideChunk] = []
-        self.embeddings: List[List[float]] = []
-        self.slide_vectors: List[np.ndarray] = []
-        self.cache_dir = settings.data_dir / "cache"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+def file_digest(path: Path) -> str:
+    """按文件内容计算 sha256，用作缓存键（上传的临时文件名每次不同）"""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-    def _ensure_index(self, dim: int) -> None:
-        if self.vector_store is None:
-            self.vector_store = VectorStore(dim=dim, index_path=self.settings.faiss_path)
 
-    def load_ppt(self, ppt_path: Path) -> List[SlideChunk]:
-        slides = parse_ppt(ppt_path)
-        self.corpus = slides
-        texts = [slide.raw_text for slide in slides]
-        embeddings = embed_texts(texts) if texts else []
-        self.embeddings = embeddings
-        self.slide_vectors = [np.array(e) for e in embeddings]
-        if embeddings:
-            self._ensure_index(len(embeddings[0]))
-            self.vector_store.add(embeddings)
-        return slides
-
-    def _dedup_indices(self, threshold: float = 0.82) -> List[int]:
-        """简单去重：找相似度高的 slides 只保留首个索引"""
-        if not self.embeddings:
-            return list(range(len(self.corpus)))
-        kept: List[int] = []
-        for i, emb in enumerate(self.embeddings):
-            duplicate = False
-            for k in kept:
-                # embeddings 已归一化，点积即相似度
-                sim = float(np.dot(np.array(emb), np.array(self.embeddings[k])))
-                if sim >= threshold:
-                    duplicate = True
-                    break
-            if not duplicate:
-                kept.append(i)
-        return kept
-
-    def _retrieve_context(self, slide: SlideChunk, top_k: int) -> List[str]:
-        if not self.vector_store:
-            return []
-        embedding = embed_single(slide.raw_text)
-        neighbors = self.vector_store.search(embedding, k=top_k)
-        context = []
-        for idx, score in neighbors:
-            if idx < len(self.corpus):
-                neighbor = self.corpus[idx]
-                context.append(f"相关页{neighbor.slide_number}({score:.2f}): {neighbor.raw_text}")
-        return context
+def _norm_text(t: str | None) -> str:
+    if not t:
+        return ""
+    t = t.lower()
+    t = t.translate(str.maketrans("", "", string.punctuation))
+    return re.sub(r"\s+", " ", t).strip()
 
-    def enrich_slide(self, slide: SlideChunk) -> SlideEnrichment:
-        search_snippets = []
-        if slide.title:
-            search_snippets = (
-                search_wikipedia(slide.title, limit=2)
-                + search_wikipedia_cn(slide.title, limit=2)
-                + search_arxiv(slide.title, limit=2)
-            )
-        context = self._retrieve_context(slide, top_k=self.settings.top_k)
-        llm_reply = self.llm.expand_slide(slide.raw_text, search_snippets + context)
-        enrichment = EnrichmentItem(
-            summary=llm_reply.split("\n")[0] if llm_reply else "",
-            expansions=[line for line in llm_reply.split("\n") if line.strip()],
-            references=context,
-            search_snippets=search_snippets,
-        )
-        return SlideEnrichment(
-            slide_number=slide.slide_number,
-            title=slide.title,
-            raw_text=slide.raw_text,
-            section=slide.section,
-            enrichment=enrichment,
-        )
 
-    def run(self, ppt_path: Path):
-        cached = self._load_cache(ppt_path)
-        if cached:
-            return cached, None
+class TopicGrouper:
+    """增量聚合主题：同一章节内按 (章节, 有效标题) 合并页面。
 
-        slides = self.load_ppt(ppt_path)
-        dedup_indices = set(self._dedup_indices())
-        filtered: List[SlideChunk] = []
-        for idx, slide in enumerate(slides):
-            # 标题单页（只有标题或极少文字）直接跳过
-            if slide.is_heading or (slide.title and not slide.raw_text.strip()):
-                continue
-            if slide.title and len(slide.raw_text.strip()) <= 30 and len(slide.raw_text.splitlines()) <= 1:
-                continue
-            # 目录页检测：标题含“目录”或正文大部分为编号条目
-            if slide.title and "目录" in slide.title:
-                continue
-            lines = [ln.strip() for ln in slide.raw_text.splitlines() if ln.strip()]
-            if lines:
-                num_lines = sum(1 for ln in lines if re.match(r"^\d+[\.\u3001\)]", ln))
-                if num_lines >= 2 and num_lines / len(lines) >= 0.6:
-                    continue
-            if idx not in dedup_indices:
-                continue
-            filtered.append(slide)
-
-        topics = self._group_topics(filtered)
-        topic_notes: List[TopicNote] = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            for idx, topic in enumerate(topics):
-                futures.append((idx, executor.submit(self._enrich_topic, topic)))
-            for idx, fut in futures:
-                result = fut.result()
-                if result:
-                    topic_notes.append((idx, result))
-        topic_notes = [r for _, r in sorted(topic_notes, key=lambda x: x[0])]
+    聚合键包含章节，换章后上一章的主题不会再增长，因此在章节边界即可交付，
+    下游检索/LLM 不必等整份 PPT 解析完。没有章节页的 PPT 靠 idle_limit 兜底：
+    连续 idle_limit 页未再出现的主题提前交付（None 表示只在章节边界/结束时交付）。
+    """
 
-        # 全局概述移除，直接返回知识块
-        self._save_cache(ppt_path, topic_notes)
-        return topic_notes, None
+    def __init__(self, idle_limit: int | None = None) -> None:
+        self.clusters: list[dict] = []
+        self.index_map: dict[tuple[str, str], dict] = {}
+        self.last_title = ""
+        self.section_key: str | None = None
+        self.idle_limit = idle_limit
+        self.added = 0
 
-    def _group_topics(self, slides: List[SlideChunk]) -> List[dict]:
-        """按 PPT 顺序聚合：基于主/子标题合并同主题页面，正文页继承最近标题"""
-        def norm_text(t: str | None) -> str:
-            if not t:
-                return ""
-            t = t.lower()
-            t = t.translate(str.maketrans("", "", string.punctuation))
-            return re.sub(r"\s+", " ", t).strip()
-
-        clusters: list[dict] = []
-        index_map: dict[tuple[str, str], dict] = {}
-        last_title = ""
-
-        for slide in slides:
-            # 跳过显式占位标题
-            if slide.title and any(kw in slide.title for kw in ["目录", "目录页", "知识块", "知识 block", "标题"]):
-                continue
+    def boundary(self, section: str | None) -> List[dict]:
+        """遇到新章节时关闭并返回当前章节的全部主题"""
+        key = _norm_text(section)
+        if self.section_key is None or key == self.section_key:
+            self.section_key = key
+            return []
+        self.section_key = key
+        return self.close()
 
-            # 决定当前页的有效标题：有标题用标题；无标题继承上一标题；若仍为空，用章节名
-            eff_title = slide.title.strip() if slide.title else ""
+    def add(self, slide: SlideChunk) -> List[dict]:
+        closed = self.boundary(slide.section)
 
-            # 若标题是步骤/编号开头（第1步、Step 1等），视为沿用上一小标题
-            if eff_title and re.match(r"^(第\\s*\\d|step\\s*\\d)", eff_title, re.IGNORECASE):
-                eff_title = last_title
+        # 跳过显式占位标题
+        if slide.title and any(kw in slide.title for kw in ["目录", "目录页", "知识块", "知识 block", "标题"]):
+            return closed
 
-            # 若标题过长（疑似正文首句），也归并到上一标题
-            if eff_title and len(eff_title) > 60:
-                eff_title = last_title
+        # 决定当前页的有效标题：有标题用标题；无标题继承上一标题；若仍为空，用章节名
+        eff_title = slide.title.strip() if slide.title else ""
 
-            if eff_title:
-                last_title = eff_title
-            else:
-                eff_title = last_title or (slide.section or "").strip()
-            if not eff_title:
-                continue
+        # 若标题是步骤/编号开头（第1步、Step 1等），视为沿用上一小标题
+        if eff_title and re.match(r"^(第\\s*\\d|step\\s*\\d)", eff_title, re.IGNORECASE):
+            eff_title = self.last_title
 
-            key_section = norm_text(slide.section)
-            key_title = norm_text(eff_title)
-            cluster_key = (key_section, key_title)
-
-            if cluster_key in index_map:
-                index_map[cluster_key]["slides"].append(slide)
-            else:
-                cluster = {
-                    "section": slide.section,
-                    "title": eff_title,
-                    "slides": [slide],
-                }
-                index_map[cluster_key] = cluster
-                clusters.append(cluster)
+        # 若标题过长（疑似正文首句），也归并到上一标题
+        if eff_title and len(eff_title) > 60:
+            eff_title = self.last_title
 
+        if eff_title:
+            self.last_title = eff_title
+        else:
+            eff_title = self.last_title or (slide.section or "").strip()
+        if not eff_title:
+            return closed
+
+        self.added += 1
+        cluster_key = (_norm_text(slide.section), _norm_text(eff_title))
+        if cluster_key in self.index_map:
+            cluster = self.index_map[cluster_key]
+            cluster["slides"].append(slide)
+        else:
+            cluster = {
+                "section": slide.section,
+                "title": eff_title,
+                "slides": [slide],
+                "key": cluster_key,
+            }
+            self.index_map[cluster_key] = cluster
+            self.clusters.append(cluster)
+        cluster["last_added"] = self.added
+
+        if self.idle_limit is not None:
+            idle = [c for c in self.clusters if self.added - c["last_added"] >= self.idle_limit]
+            if idle:
+                idle_ids = {id(c) for c in idle}
+                self.clusters = [c for c in self.clusters if id(c) not in idle_ids]
+                for c in idle:
+                    del self.index_map[c["key"]]
+                closed = closed + self._merge(idle)
+        return closed
+
+    def close(self) -> List[dict]:
+        """交付所有未关闭的主题（合并正文），并清空状态；last_title 跨章节保留"""
+        merged_clusters = self._merge(self.clusters)
+        self.clusters = []
+        self.index_map = {}
+        return merged_clusters
+
+    @staticmethod
+    def _merge(clusters: List[dict]) -> List[dict]:
         merged_clusters: List[dict] = []
         for cluster in clusters:
             merged_texts = [s.raw_text for s in cluster["slides"] if s.raw_text]
@@ -215,12 +150,286 @@ class PPTAgentPipeline:
                     "merged": merged,
                 }
             )
-        # 按首次出现的页码排序，保持原始目录顺序
-        merged_clusters.sort(key=lambda c: c["merged"].slide_number)
         return merged_clusters
 
+
+_STREAM_END = object()
+
+
+class PPTAgentPipeline:
+    # 解析 → 向量化之间的有界队列长度，以及每次向量化的最大批量
+    STREAM_QUEUE_SIZE = 32
+    STREAM_BATCH_SIZE = 16
+    # 流式聚合时，连续多少个有效页未再出现的主题即提前交付扩写
+    STREAM_TOPIC_IDLE = 6
+
+    def __init__(self, resources: AppResources | None = None, cancel: CancelToken | None = None) -> None:
+        """resources 为应用级共享资源；不传时自行创建（独立脚本使用）。cancel 用于请求级取消"""
+        self.resources = resources
+        self.cancel = cancel or CancelToken()
+        self.digest = ""
+        # 走了离线兜底的主题数；有兜底时不写整份缓存，下次请求会重试这些主题
+        self.fallback_topics = 0
+        self._fallback_lock = threading.Lock()
+        self.corpus: List[SlideChunk] = []
+        self.slide_vectors: List[np.ndarray] = []
+        if resources is not None:
+            self.settings = resources.settings
+            self.llm = resources.llm
+            self.http = resources.http
+            self.vector_store: VectorStore | None = resources.vector_store
+            self.cache_dir = resources.cache_dir
+            return
+        settings = get_settings()
+        self.settings = settings
+        self.llm = LLMClient()
+        self.http = None
+        # build a small dummy vector store; dimension will be filled after first embedding
+        self.vector_store = None
+        self.cache_dir = settings.data_dir / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _executor(self):
+        if self.resources is not None:
+            return contextlib.nullcontext(self.resources.executor)
+        return concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+    def _ensure_index(self, dim: int) -> None:
+        if self.vector_store is None:
+            self.vector_store = VectorStore(dim=dim, index_path=self.settings.faiss_path)
+
+    def _retrieve_context(self, slide: SlideChunk, top_k: int, limit: int | None = None) -> List[str]:
+        """在本 PPT 的页面向量上找近邻；共享 FAISS 索引只负责持久化，不参与单次请求的检索。
+
+        limit 为主题交付时已处理的页数，只在这些页中检索，结果不受批次划分与线程时序影响。
+        """
+        vectors = self.slide_vectors[:limit]
+        if not vectors:
+            return []
+        embedding = np.array(embed_single(slide.raw_text))
+        # embeddings 已归一化，点积即相似度
+        scores = np.stack(vectors) @ embedding
+        context = []
+        for idx in np.argsort(-scores)[:top_k]:
+            neighbor = self.corpus[idx]
+            context.append(f"相关页{neighbor.slide_number}({float(scores[idx]):.2f}): {neighbor.raw_text}")
+        return context
+
+    def _enrich(self, slide: SlideChunk, context_limit: int | None = None) -> tuple[SlideEnrichment, bool]:
+        """返回扩写结果及是否来自真实的 LLM 回复（兜底文本不写缓存）"""
+        search_snippets = []
+        if slide.title:
+            # 每次外部调用前检查取消，超时收紧到截止时间
+            for search in (search_wikipedia, search_wikipedia_cn, search_arxiv):
+                self.cancel.raise_if_cancelled()
+                search_snippets += search(
+                    slide.title, limit=2, session=self.http, timeout=self.cancel.timeout(10)
+                )
+        context = self._retrieve_context(slide, top_k=self.settings.top_k, limit=context_limit)
+        self.cancel.raise_if_cancelled()
+        prompt = self.llm.expand_prompt(slide.raw_text, search_snippets + context)
+        llm_reply = self.llm.try_complete(prompt, timeout=self.cancel.timeout(60), cancel=self.cancel)
+        # 已拿到的回复即使随后被取消也照常返回并缓存；没拿到时被取消则放弃该主题，否则兜底
+        from_llm = llm_reply is not None
+        if not from_llm:
+            self.cancel.raise_if_cancelled()
+            llm_reply = self.llm.fallback(prompt)
+        enrichment = EnrichmentItem(
+            summary=llm_reply.split("\n")[0] if llm_reply else "",
+            expansions=[line for line in llm_reply.split("\n") if line.strip()],
+            references=context,
+            search_snippets=search_snippets,
+        )
+        return (
+            SlideEnrichment(
+                slide_number=slide.slide_number,
+                title=slide.title,
+                raw_text=slide.raw_text,
+                section=slide.section,
+                enrichment=enrichment,
+            ),
+            from_llm,
+        )
+
+    def run(self, ppt_path: Path, digest: str | None = None):
+        """digest 为文件内容的 sha256，调用方已算过时直接传入，避免重复哈希"""
+        digest = digest or file_digest(ppt_path)
+        cached = self._load_cache(digest)
+        if cached is not None:
+            return cached, None
+
+        self.digest = digest
+        with contextlib.closing(self._stream_batches(ppt_path)) as batches:
+            topic_notes = self._process_batches(batches)
+        # 全局概述移除，直接返回知识块
+        self._save_results(digest, topic_notes)
+        return topic_notes, None
+
+    def run_parsed(
+        self,
+        ppt_path: Path,
+        slides: List[SlideChunk],
+        embeddings: List[List[float]],
+        digest: str | None = None,
+    ):
+        """载入已解析/已向量化的 slides（批处理时解析与向量化在子进程完成），聚合规则与 run 相同"""
+        digest = digest or file_digest(ppt_path)
+        cached = self._load_cache(digest)
+        if cached is not None:
+            return cached, None
+
+        self.digest = digest
+        size = self.STREAM_BATCH_SIZE
+        batches = ((slides[i : i + size], embeddings[i : i + size]) for i in range(0, len(slides), size))
+        topic_notes = self._process_batches(batches)
+        self._save_results(digest, topic_notes)
+        return topic_notes, None
+
+    @staticmethod
+    def _is_filler(slide: SlideChunk) -> bool:
+        """标题页、过短页、目录页不单独扩写"""
+        # 标题单页（只有标题或极少文字）直接跳过
+        if slide.is_heading or (slide.title and not slide.raw_text.strip()):
+            return True
+        if slide.title and len(slide.raw_text.strip()) <= 30 and len(slide.raw_text.splitlines()) <= 1:
+            return True
+        # 目录页检测：标题含“目录”或正文大部分为编号条目
+        if slide.title and "目录" in slide.title:
+            return True
+        lines = [ln.strip() for ln in slide.raw_text.splitlines() if ln.strip()]
+        if lines:
+            num_lines = sum(1 for ln in lines if re.match(r"^\d+[\.\u3001\)]", ln))
+            if num_lines >= 2 and num_lines / len(lines) >= 0.6:
+                return True
+        return False
+
+    def _stream_batches(self, ppt_path: Path) -> Iterator[tuple[List[SlideChunk], List[List[float]]]]:
+        """边解析边向量化：解析线程把页面放入有界队列，当前线程按批取出做向量化"""
+        slide_queue: queue.Queue = queue.Queue(maxsize=self.STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def _put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    slide_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                for slide in iter_ppt(ppt_path):
+                    if not _put(slide):
+                        return
+                _put(_STREAM_END)
+            except BaseException as e:
+                _put(e)
+
+        producer = threading.Thread(target=produce, name="ppt-parse", daemon=True)
+        producer.start()
+        try:
+            finished = False
+            while not finished:
+                self.cancel.raise_if_cancelled()
+                batch: List[SlideChunk] = []
+                try:
+                    # 带超时等待，解析较慢时也能及时响应取消
+                    item = slide_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                while True:
+                    if isinstance(item, BaseException):
+                        raise item
+                    if item is _STREAM_END:
+                        finished = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.STREAM_BATCH_SIZE:
+                        break
+                    try:
+                        item = slide_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    yield batch, embed_texts([slide.raw_text for slide in batch])
+        finally:
+            stop.set()
+
+    def _process_batches(
+        self,
+        batches: Iterable[tuple[List[SlideChunk], List[List[float]]]],
+        dedup_threshold: float = 0.82,
+    ) -> List[TopicNote]:
+        """去重 → 增量聚合 → 扩写，run 与 run_parsed 共用，同一份 PPT 得到相同的主题。
+
+        每页只与已保留页比对去重，再送入 TopicGrouper；主题一交付即提交到扩写线程池，
+        检索与 LLM 与后续页面的解析、向量化并行进行。
+        """
+        grouper = TopicGrouper(idle_limit=self.STREAM_TOPIC_IDLE)
+        kept: List[np.ndarray] = []
+        futures: List[tuple[int, concurrent.futures.Future]] = []
+        with self._executor() as executor:
+            try:
+
+                def submit(topics: List[dict], seen: int) -> None:
+                    for topic in topics:
+                        # 近邻只取交付时已处理的页，保证 references 与时序无关
+                        topic["context_limit"] = seen
+                        futures.append((topic["merged"].slide_number, executor.submit(self._enrich_topic, topic)))
+
+                for slides, embeddings in batches:
+                    self.cancel.raise_if_cancelled()
+                    if not slides:
+                        continue
+                    vectors = [np.array(e) for e in embeddings]
+                    self.corpus.extend(slides)
+                    self.slide_vectors.extend(vectors)
+                    self._ensure_index(len(embeddings[0]))
+                    self.vector_store.add(embeddings)
+
+                    seen = len(self.corpus) - len(slides)
+                    for slide, vec in zip(slides, vectors):
+                        seen += 1
+                        submit(grouper.boundary(slide.section), seen)
+                        # embeddings 已归一化，点积即相似度；只和已保留页比较
+                        duplicate = bool(kept) and float(np.max(np.stack(kept) @ vec)) >= dedup_threshold
+                        if not duplicate:
+                            kept.append(vec)
+                        if duplicate or self._is_filler(slide):
+                            continue
+                        submit(grouper.add(slide), seen)
+                submit(grouper.close(), len(self.corpus))
+                return self._collect(futures)
+            except BaseException:
+                # 取消或出错：尚未开始的主题直接撤销，正在运行的会在下一个检查点退出
+                for _, fut in futures:
+                    fut.cancel()
+                raise
+
+    def _collect(self, futures: List[tuple[int, concurrent.futures.Future]]) -> List[TopicNote]:
+        """按序收集扩写结果；等待期间轮询取消状态，取消时撤销尚未开始的主题"""
+        pending = {fut for _, fut in futures}
+        try:
+            while pending:
+                self.cancel.raise_if_cancelled()
+                _, pending = concurrent.futures.wait(pending, timeout=0.2)
+        except BaseException:
+            for fut in pending:
+                fut.cancel()
+            raise
+        results = []
+        for _, fut in sorted(futures, key=lambda x: x[0]):
+            result = fut.result()
+            if result:
+                results.append(result)
+        return results
+
     def _enrich_topic(self, topic: dict) -> TopicNote | None:
-        enriched = self.enrich_slide(topic["merged"])
+        cached = self._load_topic_cache(topic)
+        if cached is not None:
+            return cached
+        enriched, from_llm = self._enrich(topic["merged"], topic.get("context_limit"))
         cleaned_expansions = []
         for line in enriched.enrichment.expansions:
             if not line:
@@ -237,6 +446,11 @@ class PPTAgentPipeline:
         title_text = topic["title"] or ""
         if any(word in title_text for word in ["目录", "知识块"]):
             return None
+        if from_llm:
+            self._save_topic_cache(topic, enriched.enrichment)
+        else:
+            with self._fallback_lock:
+                self.fallback_topics += 1
         return TopicNote(
             title=topic["title"],
             slide_numbers=topic["slide_numbers"],
@@ -245,13 +459,47 @@ class PPTAgentPipeline:
             enrichment=enriched.enrichment,
         )
 
-    def _cache_path(self, ppt_path: Path) -> Path:
-        stat = ppt_path.stat()
-        key = f"{ppt_path.stem}_{stat.st_mtime_ns}_{stat.st_size}.json"
-        return self.cache_dir / key
+    def _topic_cache_path(self, topic: dict) -> Path:
+        """单个主题的缓存：请求中途取消时已完成的主题仍可复用。
+
+        按 PPT 分目录：references 里的“相关页”是本 PPT 的近邻，不能串到其他 PPT。
+        """
+        key = "\n".join([topic["section"] or "", topic["title"] or "", topic["merged"].raw_text])
+        topic_digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / "topics" / self.digest / f"{topic_digest}.json"
+
+    def _load_topic_cache(self, topic: dict) -> TopicNote | None:
+        path = self._topic_cache_path(topic)
+        if not path.exists():
+            return None
+        try:
+            enrichment = EnrichmentItem.model_validate_json(path.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        return TopicNote(
+            title=topic["title"],
+            slide_numbers=topic["slide_numbers"],
+            section=topic["section"],
+            raw_text=topic["merged"].raw_text,
+            enrichment=enrichment,
+        )
+
+    def _save_topic_cache(self, topic: dict, enrichment: EnrichmentItem) -> None:
+        atomic_write_text(self._topic_cache_path(topic), enrichment.model_dump_json())
+
+    def _save_results(self, digest: str, topics: List[TopicNote]) -> None:
+        """只有全部主题都来自真实 LLM 回复（或主题缓存）时才写整份缓存，兜底结果不会被固化"""
+        if self.fallback_topics:
+            return
+        self._save_cache(digest, topics)
+        # 整份缓存写入后逐主题缓存已无用，删除以免 topics/ 目录无限增长
+        shutil.rmtree(self.cache_dir / "topics" / digest, ignore_errors=True)
+
+    def _cache_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.json"
 
-    def _load_cache(self, ppt_path: Path):
-        path = self._cache_path(ppt_path)
+    def _load_cache(self, digest: str):
+        path = self._cache_path(digest)
         if not path.exists():
             return None
         try:
@@ -276,8 +524,8 @@ class PPTAgentPipeline:
         except Exception:
             return None
 
-    def _save_cache(self, ppt_path: Path, topics: List[TopicNote]) -> None:
-        path = self._cache_path(ppt_path)
+    def _save_cache(self, digest: str, topics: List[TopicNote]) -> None:
+        path = self._cache_path(digest)
         payload = {
             "topics": [
                 {
@@ -295,4 +543,4 @@ class PPTAgentPipeline:
                 for t in topics
             ]
         }
-        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        atomic_write_text(path, json.dumps(payload, ensure_ascii=False))
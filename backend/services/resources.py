@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import concurrent.futures
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import Settings, get_settings
+from .embedding import _get_model
+from .llm import LLMClient
+from .vector_store import VectorStore
+
+
+@dataclass
+class AppResources:
+    """应用级共享资源：启动时创建一次，所有请求复用，退出时统一关闭"""
+
+    settings: Settings
+    http: requests.Session
+    llm: LLMClient
+    vector_store: VectorStore
+    executor: concurrent.futures.ThreadPoolExecutor
+    cache_dir: Path
+
+    def close(self) -> None:
+        # 先等正在扩写的主题完成，再落盘索引、关闭连接池
+        self.executor.shutdown(wait=True)
+        self.vector_store.flush()
+        self.http.close()
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_resources(settings: Settings | None = None) -> AppResources:
+    settings = settings or get_settings()
+    model = _get_model()
+    http = _build_session(pool_size=max(10, settings.enrich_workers * 2))
+    cache_dir = settings.data_dir / "cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return AppResources(
+        settings=settings,
+        http=http,
+        llm=LLMClient(session=http),
+        vector_store=VectorStore(
+            dim=model.get_sentence_embedding_dimension(),
+            index_path=settings.faiss_path,
+            # 攒够一批再落盘，减少整份索引的读写；剩余部分在 close() 时 flush
+            flush_every=256,
+        ),
+        executor=concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.enrich_workers, thread_name_prefix="enrich"
+        ),
+        cache_dir=cache_dir,
+    )
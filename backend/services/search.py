@@ -7,7 +7,9 @@ import feedparser
 import requests
 
 
-def search_wikipedia(query: str, limit: int = 3) -> List[str]:
+def search_wikipedia(
+    query: str, limit: int = 3, session: requests.Session | None = None, timeout: float = 10
+) -> List[str]:
     params = {
         "action": "query",
         "list": "search",
@@ -16,7 +18,7 @@ def search_wikipedia(query: str, limit: int = 3) -> List[str]:
         "srlimit": limit,
     }
     try:
-        resp = requests.get("https://en.wikipedia.org/w/api.php", params=params, timeout=10)
+        resp = (session or requests).get("https://en.wikipedia.org/w/api.php", params=params, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         results = data.get("query", {}).get("search", [])
@@ -30,7 +32,9 @@ def search_wikipedia(query: str, limit: int = 3) -> List[str]:
         return []
 
 
-def search_wikipedia_cn(query: str, limit: int = 3) -> List[str]:
+def search_wikipedia_cn(
+    query: str, limit: int = 3, session: requests.Session | None = None, timeout: float = 10
+) -> List[str]:
     params = {
         "action": "query",
         "list": "search",
@@ -39,7 +43,7 @@ def search_wikipedia_cn(query: str, limit: int = 3) -> List[str]:
         "srlimit": limit,
     }
     try:
-        resp = requests.get("https://zh.wikipedia.org/w/api.php", params=params, timeout=10)
+        resp = (session or requests).get("https://zh.wikipedia.org/w/api.php", params=params, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         results = data.get("query", {}).get("search", [])
@@ -53,10 +57,14 @@ def search_wikipedia_cn(query: str, limit: int = 3) -> List[str]:
         return []
 
 
-def search_arxiv(query: str, limit: int = 3) -> List[str]:
+def search_arxiv(
+    query: str, limit: int = 3, session: requests.Session | None = None, timeout: float = 10
+) -> List[str]:
     api_url = f"http://export.arxiv.org/api/query?search_query=all:{query}&start=0&max_results={limit}"
     try:
-        feed = feedparser.parse(api_url)
+        resp = (session or requests).get(api_url, timeout=timeout)
+        resp.raise_for_status()
+        feed = feedparser.parse(resp.content)
         results = []
         for entry in feed.entries[:limit]:
             title = getattr(entry, "title", "").strip()
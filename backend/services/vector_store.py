@@ -1,38 +1,61 @@
 from __future__ import annotations
 
+import os
+import threading
 from pathlib import Path
-from typing import List, Tuple
+from typing import List
 
 import faiss
 import numpy as np
 
+from .storage import file_lock, temp_path_for
+
 
 class VectorStore:
-    def __init__(self, dim: int, index_path: Path):
+    """只追加的向量持久化：内存里只缓冲尚未落盘的向量，不常驻整份索引。
+
+    单次请求的近邻检索在 PPT 自己的页面向量上完成，这里只负责把向量累积写入 faiss.index。
+    """
+
+    def __init__(self, dim: int, index_path: Path, flush_every: int = 0):
         self.dim = dim
         self.index_path = index_path
-        if index_path.exists():
-            self.index = faiss.read_index(str(index_path))
-        else:
-            self.index = faiss.IndexFlatIP(dim)
+        # 缓冲满 flush_every 条向量即落盘；0 表示每次 add 都落盘（独立脚本使用）
+        self.flush_every = flush_every
+        # 上次落盘之后新增的向量；落盘时合并到磁盘上的最新索引，避免覆盖其他进程的写入
+        self._pending: List[np.ndarray] = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
 
     def add(self, vectors: List[List[float]]) -> None:
         arr = np.array(vectors).astype("float32")
         if arr.shape[1] != self.dim:
             raise ValueError("Vector dimension mismatch")
-        self.index.add(arr)
-        self._persist()
-
-    def search(self, query: List[float], k: int = 4) -> List[Tuple[int, float]]:
-        query_arr = np.array([query]).astype("float32")
-        scores, indices = self.index.search(query_arr, k)
-        result = []
-        for idx, score in zip(indices[0], scores[0]):
-            if idx == -1:
-                continue
-            result.append((int(idx), float(score)))
-        return result
+        with self._lock:
+            self._pending.append(arr)
+            self._pending_rows += len(arr)
+            if self._pending_rows >= self.flush_every:
+                self._persist()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._persist()
 
     def _persist(self) -> None:
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(self.index_path))
+        with file_lock(self.index_path):
+            if self.index_path.exists():
+                index = faiss.read_index(str(self.index_path))
+            else:
+                index = faiss.IndexFlatIP(self.dim)
+            for arr in self._pending:
+                index.add(arr)
+            tmp = temp_path_for(self.index_path)
+            try:
+                faiss.write_index(index, str(tmp))
+                os.replace(tmp, self.index_path)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        self._pending = []
+        self._pending_rows = 0